@@ -1,4 +1,5 @@
 from alembic import context
+from alembic.runtime.migration import MigrationContext
 from sqlalchemy import create_engine
 
 from wikiapp.db import metadata
@@ -6,13 +7,34 @@ from wikiapp.db import metadata
 config = context.config
 
 
+def _already_at_target(connection) -> bool:
+    """True when asked for head and the database is already there."""
+    head = context.script.get_current_head()
+    try:
+        target = context.get_revision_argument()
+    except KeyError:  # commands without a target, e.g. `alembic current`
+        return False
+    if target not in ("head", head):
+        return False
+    current = MigrationContext.configure(connection).get_current_revision()
+    # End the read's autobegun transaction; otherwise Alembic treats it as an
+    # outer transaction owned by the caller and never commits the migration.
+    connection.rollback()
+    return current == head
+
+
 def run_migrations_online() -> None:
     url = config.get_main_option("sqlalchemy.url")
     connectable = create_engine(url)
-    with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=metadata)
-        with context.begin_transaction():
-            context.run_migrations()
+    try:
+        with connectable.connect() as connection:
+            if _already_at_target(connection):
+                return
+            context.configure(connection=connection, target_metadata=metadata)
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        connectable.dispose()
 
 
 run_migrations_online()
@@ -0,0 +1,24 @@
+"""Store the training sample count alongside each registered model.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("model_registry", sa.Column("n_samples", sa.BigInteger()))
+
+
+def downgrade() -> None:
+    op.drop_column("model_registry", "n_samples")
@@ -0,0 +1,28 @@
+"""Index museum_city_features for the /museums ordering.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_features_visitors_desc",
+        "museum_city_features",
+        [sa.text("annual_visitors DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_features_visitors_desc", table_name="museum_city_features")
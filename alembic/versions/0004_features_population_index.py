@@ -0,0 +1,32 @@
+"""Index the training read.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Covers the training query (population, annual_visitors) with an
+    # index-only scan over rows that have a population.
+    op.create_index(
+        "ix_features_population",
+        "museum_city_features",
+        ["population"],
+        postgresql_include=["annual_visitors"],
+        postgresql_where=sa.text("population IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_features_population", table_name="museum_city_features")
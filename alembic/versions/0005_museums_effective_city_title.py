@@ -0,0 +1,41 @@
+"""Store each museum's effective city title for the population lookup.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "museums_raw",
+        sa.Column(
+            "effective_city_title",
+            sa.Text,
+            sa.Computed(
+                "COALESCE(NULLIF(city_wikipedia_title, ''), NULLIF(city, ''))",
+                persisted=True,
+            ),
+        ),
+    )
+    op.create_index(
+        "ix_museums_raw_effective_city_title",
+        "museums_raw",
+        ["effective_city_title"],
+        postgresql_where=sa.text("effective_city_title IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_museums_raw_effective_city_title", table_name="museums_raw")
+    op.drop_column("museums_raw", "effective_city_title")
@@ -3,77 +3,167 @@
 Endpoints:
   GET  /health      — liveness check
   GET  /museums     — list all museums with city population
+                      (NDJSON stream with ``Accept: application/x-ndjson``)
   GET  /regression  — latest model summary from registry
   POST /predict     — predict visitors for a given city population
+
+Endpoints are async over the asyncpg engine. The repository helpers stay
+synchronous and run through ``AsyncSession.run_sync``, which awaits the
+driver on the event loop without tying up a worker thread.
 """
 
 from __future__ import annotations
 
-import numpy as np
-from fastapi import FastAPI, HTTPException
+import math
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from wikiapp.db import get_engine
+from wikiapp.db import get_async_engine
 from wikiapp.repositories import features as features_repo
-from wikiapp.services.training import load_latest_model, summary_from_db
+from wikiapp.repositories import models as models_repo
+from wikiapp.services.training import load_model
 from wikiapp.schemas import MuseumOut, PredictRequest, PredictResponse, RegressionOut
 
 app = FastAPI(title="Museum Visitor Analysis API", version="0.3.0")
 
+_MUSEUM_LIST = TypeAdapter(list[MuseumOut])
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
 
+@dataclass(frozen=True)
+class _CachedModel:
+    registry_id: int
+    version: str
+    coef: float
+    intercept: float
+    regression: RegressionOut
 
-@app.get("/museums", response_model=list[MuseumOut])
-def list_museums():
-    """Return all museums in the feature table."""
-    engine = get_engine()
-    df = features_repo.read_all(engine)
-    if df.empty:
-        raise HTTPException(404, "No data. Run the pipeline first.")
-    return df.to_dict(orient="records")
 
+# Last model loaded from disk, with its /regression payload pre-built.
+_model_cache: _CachedModel | None = None
 
-@app.get("/regression", response_model=RegressionOut)
-def regression():
-    """Return the latest regression model summary."""
-    engine = get_engine()
-    summary = summary_from_db(engine)
-    if not summary:
-        raise HTTPException(404, "No model found. Run training first.")
 
-    model, version = load_latest_model(engine)
+def _build_regression(session: Session, model: Any, meta: dict) -> RegressionOut:
     coef = float(model.coef_[0])
     intercept = float(model.intercept_)
-
-    n = features_repo.count(engine)
+    # Models registered before n_samples was tracked fall back to a COUNT(*).
+    n_samples = meta["n_samples"]
+    if n_samples is None:
+        n_samples = features_repo.count(session)
 
     return RegressionOut(
         equation=f"log(visitors) = {coef:.4f} * log(population) + {intercept:.4f}",
         coefficient=coef,
         intercept=intercept,
-        r_squared=summary["r2"],
-        rmse=summary["rmse"],
-        mae=summary["mae"],
-        n_samples=n,
-        model_version=version,
+        r_squared=meta["r2"],
+        rmse=meta["rmse"],
+        mae=meta["mae"],
+        n_samples=n_samples,
+        model_version=meta["model_version"],
     )
 
 
-@app.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
-    """Predict museum visitors given a city population."""
-    engine = get_engine()
+def _get_cached_model(session: Session) -> _CachedModel:
+    """Return the latest model, reloading only when the registry has moved on."""
+    global _model_cache
+    latest_id = models_repo.get_latest_id(session)
+    if latest_id is None:
+        raise ValueError("No model found in model_registry. Run training first.")
+    if _model_cache is None or _model_cache.registry_id != latest_id:
+        meta = models_repo.read_latest(session)
+        model = load_model(meta["artifact_path"])
+        _model_cache = _CachedModel(
+            registry_id=latest_id,
+            version=meta["model_version"],
+            coef=float(model.coef_[0]),
+            intercept=float(model.intercept_),
+            regression=_build_regression(session, model, meta),
+        )
+    return _model_cache
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+async def _museum_lines() -> AsyncIterator[bytes]:
+    async with get_async_engine().connect() as conn:
+        async for row in features_repo.stream_all(conn):
+            yield to_json(dict(row)) + b"\n"
+
+
+async def _stream_museums() -> StreamingResponse:
+    lines = _museum_lines()
+    # Pull the first row before committing to a 200 so an empty table can
+    # still answer 404 like the JSON path.
     try:
-        model, version = load_latest_model(engine)
-    except ValueError as exc:
-        raise HTTPException(503, str(exc)) from exc
+        first = await anext(lines)
+    except StopAsyncIteration:
+        raise HTTPException(404, "No data. Run the pipeline first.") from None
+
+    async def body() -> AsyncIterator[bytes]:
+        yield first
+        async for line in lines:
+            yield line
 
-    log_pred = model.predict(np.array([[np.log(req.population)]], dtype=float))[0]
-    predicted = np.exp(log_pred)
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.get("/museums", response_model=list[MuseumOut])
+async def list_museums(request: Request):
+    """Return all museums in the feature table.
+
+    Clients that send ``Accept: application/x-ndjson`` get one JSON object
+    per line, streamed from a server-side cursor instead of buffered.
+    """
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        return await _stream_museums()
+
+    async with AsyncSession(get_async_engine()) as session:
+        rows = await session.run_sync(features_repo.read_all)
+    if not rows:
+        raise HTTPException(404, "No data. Run the pipeline first.")
+    # Rows come from our own table, whose columns already match MuseumOut, so
+    # skip validation and serialize straight to JSON. Returning a Response
+    # bypasses FastAPI's response_model pass; the annotation stays for the docs.
+    museums = [MuseumOut.model_construct(**row) for row in rows]
+    return Response(_MUSEUM_LIST.dump_json(museums), media_type="application/json")
+
+
+@app.get("/regression", response_model=RegressionOut)
+async def regression():
+    """Return the latest regression model summary."""
+    async with AsyncSession(get_async_engine()) as session:
+        try:
+            cached = await session.run_sync(_get_cached_model)
+        except ValueError as exc:
+            raise HTTPException(404, "No model found. Run training first.") from exc
+    return cached.regression
+
+
+@app.post("/predict", response_model=PredictResponse)
+async def predict(req: PredictRequest):
+    """Predict museum visitors given a city population."""
+    async with AsyncSession(get_async_engine()) as session:
+        try:
+            cached = await session.run_sync(_get_cached_model)
+        except ValueError as exc:
+            raise HTTPException(503, str(exc)) from exc
+
+    # The model is a single-feature linear fit on log(population); evaluating
+    # it on plain floats avoids NumPy array setup for a 1x1 input.
+    log_pred = cached.coef * math.log(req.population) + cached.intercept
+    predicted = math.exp(log_pred)
     return PredictResponse(
         population=req.population,
         predicted_visitors=max(0, int(predicted)),
-        model_version=version,
+        model_version=cached.version,
     )
@@ -14,9 +14,6 @@ import argparse
 import logging
 
 from wikiapp.db import migrate_db
-from wikiapp.services.etl import enrich_population, get_distinct_city_titles, ingest_museums
-from wikiapp.services.training import train
-from wikiapp.services.transform import build_feature_table
 
 
 def _build_parser() -> argparse.ArgumentParser:
@@ -34,8 +31,12 @@ def _build_parser() -> argparse.ArgumentParser:
 
 
 # ---- pipeline steps ----
+# Services are imported inside each step so `migrate-db` and single steps
+# don't pay for NumPy / sklearn / lxml / HTTP client imports they never use.
 
 def _run_etl() -> dict[str, int]:
+    from wikiapp.services.etl import enrich_population, get_distinct_city_titles, ingest_museums
+
     museums = ingest_museums()
     titles = get_distinct_city_titles()
     cities = enrich_population(titles)
@@ -43,10 +44,14 @@ def _run_etl() -> dict[str, int]:
 
 
 def _run_features() -> int:
+    from wikiapp.services.transform import build_feature_table
+
     return build_feature_table()
 
 
 def _run_train() -> dict:
+    from wikiapp.services.training import train
+
     r = train()
     return {"model_version": r.model_version, "r2": r.r2, "rmse": r.rmse}
 
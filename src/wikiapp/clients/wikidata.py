@@ -3,10 +3,16 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterator, Mapping, Sequence
 from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from wikiapp.config import settings
 
@@ -15,73 +21,129 @@ logger = logging.getLogger(__name__)
 WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
 WIKIDATA_API = "https://www.wikidata.org/w/api.php"
 
+# Both the MediaWiki query API and wbgetentities cap multi-value params at 50.
+MAX_TITLES_PER_REQUEST = 50
+
+# Shared across threads so keep-alive connections to both APIs are reused
+# instead of paying a TCP + TLS handshake per request.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
 
 # ------------------------------------------------------------------
 # Wikidata API helpers
 # ------------------------------------------------------------------
 
-def _headers() -> dict[str, str]:
+@lru_cache(maxsize=1)
+def _headers() -> Mapping[str, str]:
+    # Settings are frozen, so the headers are built once per process.
     h = {"User-Agent": settings.wikipedia_user_agent, "Accept": "application/json"}
     if settings.wikidata_token:
         h["Authorization"] = f"Bearer {settings.wikidata_token}"
-    return h
+    return MappingProxyType(h)
+
+
+def _chunks(items: Sequence[str], size: int) -> Iterator[list[str]]:
+    for i in range(0, len(items), size):
+        yield list(items[i:i + size])
+
+
+def _item_ids_from_query(data: dict[str, Any]) -> dict[str, str]:
+    """Map each requested title to its Wikidata item ID from a ``query`` response.
+
+    MediaWiki reports pages under their canonical title, after normalization
+    (``New_York_City`` -> ``New York City``) and redirects (``NYC`` ->
+    ``New York City``); both lists are walked back to the requested titles.
+    """
+    query = data.get("query", {})
+    sources: dict[str, list[str]] = {}
+    for step in (*query.get("normalized", []), *query.get("redirects", [])):
+        sources.setdefault(step["to"], []).append(step["from"])
+
+    item_ids: dict[str, str] = {}
+    for page in query.get("pages", {}).values():
+        item_id = page.get("pageprops", {}).get("wikibase_item")
+        if not item_id:
+            continue
+        pending = [page.get("title")]
+        while pending:
+            title = pending.pop()
+            if title in item_ids:
+                continue
+            item_ids[title] = item_id
+            pending.extend(sources.get(title, ()))
+    return item_ids
+
+
+def _get_wikidata_item_ids(wikipedia_titles: Sequence[str]) -> dict[str, str]:
+    """Resolve Wikipedia page titles to Wikidata item IDs, batched per request."""
+    item_ids: dict[str, str] = {}
+    unique_titles = list(dict.fromkeys(wikipedia_titles))
+    for batch in _chunks(unique_titles, MAX_TITLES_PER_REQUEST):
+        params = {
+            "action": "query",
+            "titles": "|".join(batch),
+            "prop": "pageprops",
+            "redirects": 1,
+            "format": "json",
+        }
+        resp = _SESSION.get(WIKIPEDIA_API, params=params, headers=_headers(), timeout=15)
+        resp.raise_for_status()
+        item_ids.update(_item_ids_from_query(resp.json()))
+    return item_ids
 
 
 def _get_wikidata_item_id(wikipedia_title: str) -> str | None:
     """Resolve a Wikipedia page title to a Wikidata item ID (e.g. Q90 for Paris)."""
-    params = {
-        "action": "query",
-        "titles": wikipedia_title,
-        "prop": "pageprops",
-        "format": "json",
-    }
-    resp = requests.get(WIKIPEDIA_API, params=params, headers=_headers(), timeout=15)
-    resp.raise_for_status()
-    for page in resp.json().get("query", {}).get("pages", {}).values():
-        item_id = page.get("pageprops", {}).get("wikibase_item")
-        if item_id:
-            return item_id
-    return None
+    return _get_wikidata_item_ids([wikipedia_title]).get(wikipedia_title)
+
+
+@lru_cache(maxsize=1024)
+def _date_from_wikidata_time(raw: str) -> date | None:
+    """Parse a Wikidata time string like ``+2020-01-01T00:00:00Z`` to a date."""
+    if not raw.startswith("+"):
+        return None
+    try:
+        return date.fromisoformat(raw[1:11])
+    except ValueError:
+        return None
 
 
 def _parse_population_statement(stmt: dict[str, Any]) -> tuple[int | None, date | None]:
     """Extract population value and point-in-time qualifier from a Wikidata claim."""
-    amount = stmt.get("mainsnak", {}).get("datavalue", {}).get("value", {}).get("amount")
+    try:
+        amount = stmt["mainsnak"]["datavalue"]["value"]["amount"]
+    except (KeyError, TypeError):
+        amount = None
     population = None
     if isinstance(amount, str):
         try:
-            population = int(amount.replace("+", ""))
+            population = int(amount.lstrip("+"))
         except ValueError:
             pass
     elif isinstance(amount, (int, float)):
         population = int(amount)
 
     as_of = None
-    for pit in stmt.get("qualifiers", {}).get("P585", []):
-        raw = pit.get("datavalue", {}).get("value", {}).get("time")
-        if isinstance(raw, str) and raw.startswith("+"):
-            try:
-                as_of = date.fromisoformat(raw[1:11])
-            except ValueError:
-                pass
+    qualifiers = stmt.get("qualifiers")
+    for pit in (qualifiers.get("P585") if qualifiers else None) or ():
+        try:
+            raw = pit["datavalue"]["value"]["time"]
+        except (KeyError, TypeError):
+            continue
+        if isinstance(raw, str):
+            parsed = _date_from_wikidata_time(raw)
+            if parsed is not None:
+                as_of = parsed
     return population, as_of
 
 
-def _fetch_population_from_wikidata(item_id: str) -> dict[str, Any] | None:
-    """Fetch the most recent population figure from Wikidata for a given item."""
-    params = {
-        "action": "wbgetentities",
-        "ids": item_id,
-        "props": "labels|claims",
-        "languages": "en",
-        "format": "json",
-    }
-    resp = requests.get(WIKIDATA_API, params=params, headers=_headers(), timeout=15)
-    resp.raise_for_status()
-    entity = resp.json().get("entities", {}).get(item_id)
-    if not entity:
-        return None
-
+def _population_from_entity(item_id: str, entity: dict[str, Any]) -> dict[str, Any] | None:
+    """Pick the most recent population figure out of a Wikidata entity."""
     labels = entity.get("labels", {})
     city_name = labels.get("en", {}).get("value") or item_id
 
@@ -91,14 +153,13 @@ def _fetch_population_from_wikidata(item_id: str) -> dict[str, Any] | None:
     if not parsed:
         return None
 
-    # Prefer most recent dated value
+    # Prefer most recent dated value, else the largest figure. max() keeps the
+    # first of equal keys, so scan in reverse to let later statements win ties.
     with_dates = [(p, d) for p, d in parsed if d is not None]
     if with_dates:
-        with_dates.sort(key=lambda x: x[1])
-        population, as_of = with_dates[-1]
+        population, as_of = max(reversed(with_dates), key=itemgetter(1))
     else:
-        parsed.sort(key=lambda x: x[0])
-        population, as_of = parsed[-1]
+        population, as_of = max(reversed(parsed), key=itemgetter(0))
 
     return {
         "city": city_name,
@@ -108,17 +169,57 @@ def _fetch_population_from_wikidata(item_id: str) -> dict[str, Any] | None:
     }
 
 
+def _fetch_populations_from_wikidata(item_ids: Sequence[str]) -> dict[str, dict[str, Any]]:
+    """Fetch the most recent population figure for each item, batched per request."""
+    populations: dict[str, dict[str, Any]] = {}
+    for batch in _chunks(item_ids, MAX_TITLES_PER_REQUEST):
+        params = {
+            "action": "wbgetentities",
+            "ids": "|".join(batch),
+            "props": "labels|claims",
+            "languages": "en",
+            "format": "json",
+        }
+        resp = _SESSION.get(WIKIDATA_API, params=params, headers=_headers(), timeout=15)
+        resp.raise_for_status()
+        entities = resp.json().get("entities", {})
+        for item_id in batch:
+            entity = entities.get(item_id)
+            result = _population_from_entity(item_id, entity) if entity else None
+            if result:
+                populations[item_id] = result
+    return populations
+
+
+def _fetch_population_from_wikidata(item_id: str) -> dict[str, Any] | None:
+    """Fetch the most recent population figure from Wikidata for a given item."""
+    return _fetch_populations_from_wikidata([item_id]).get(item_id)
+
+
 # ------------------------------------------------------------------
 # Public API
 # ------------------------------------------------------------------
 
+def get_city_populations(city_wikipedia_titles: Sequence[str]) -> list[dict[str, Any]]:
+    """Return population data for each city found on Wikidata.
+
+    Titles are resolved in batches of ``MAX_TITLES_PER_REQUEST``, so N cities
+    cost two round-trips per batch rather than two per city. Cities without
+    a Wikidata item or population claim are left out of the result.
+    """
+    item_ids = _get_wikidata_item_ids(city_wikipedia_titles)
+    populations = _fetch_populations_from_wikidata(list(dict.fromkeys(item_ids.values())))
+
+    results = []
+    for title in city_wikipedia_titles:
+        result = populations.get(item_ids.get(title))
+        if result:
+            logger.debug("Wikidata population for %s: %s", title, result["population"])
+            results.append({**result, "city_wikipedia_title": title})
+    return results
+
+
 def get_city_population(city_wikipedia_title: str) -> dict[str, Any] | None:
     """Return population data for a city from Wikidata."""
-    item_id = _get_wikidata_item_id(city_wikipedia_title)
-    if not item_id:
-        return None
-    result = _fetch_population_from_wikidata(item_id)
-    if result:
-        logger.debug("Wikidata population for %s: %s", city_wikipedia_title, result["population"])
-        return {**result, "city_wikipedia_title": city_wikipedia_title}
-    return None
+    results = get_city_populations([city_wikipedia_title])
+    return results[0] if results else None
@@ -1,6 +1,13 @@
 """Fetch museum data from the Wikipedia API.
 
-Uses pandas.read_html for HTML table parsing.
+Parses the attendance table with an lxml target (SAX-style) parser, keeping
+the cell semantics of pandas.read_html (whitespace cleanup, first link per
+cell, rowspan and colspan expansion, hidden elements dropped) without
+building a document tree or DataFrames.
+
+Parsed rows are cached on disk with the page revision they came from; a
+run only re-downloads and re-parses the page when Wikipedia has a newer
+revision.
 
 The >2 M visitor threshold is applied at fetch time so downstream code
 always works with the target population of museums.
@@ -8,39 +15,126 @@ always works with the target population of museums.
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import re
-from io import StringIO
+from pathlib import Path
 from urllib.parse import unquote
 
-import pandas as pd
+import lxml.etree
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from wikiapp.config import settings
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON for the page response and cache
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
 MUSEUM_PAGE = "List_of_most-visited_museums"
 SOURCE_URL = "https://en.wikipedia.org/wiki/List_of_most_visited_museums"
 
+# The revision check and the page download go to the same host back to
+# back; one keep-alive session saves the second TCP + TLS handshake.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+CACHE_FILE = "museums_page.json"
+# Bump when parse_museums_from_html output changes so stale caches are ignored.
+CACHE_VERSION = 3
+
+# Cell-cleaning patterns, compiled once and reused for every table row.
+_MILLION = re.compile(r"[\s]*([0-9]+)(?:\.([0-9]+))?\s*million", re.IGNORECASE)
+_NON_DIGIT = re.compile(r"[^\d]")
+_YEAR = re.compile(r"\((?:FY\s+)?(\d{4})")
+_BRACKETS = re.compile(r"\[.*?\]")
+_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+
+# str.translate table deleting every ASCII character that isn't 0-9.
+_DROP_ASCII_NON_DIGITS = str.maketrans("", "", "".join(
+    chr(c) for c in range(128) if not chr(c).isdigit()
+))
+
 
 # ------------------------------------------------------------------
 # HTML fetch
 # ------------------------------------------------------------------
 
-def _fetch_html() -> str:
+def _latest_revid() -> int | None:
+    """Return the current revision ID of the museum page (a few hundred bytes)."""
+    headers = {"User-Agent": settings.wikipedia_user_agent}
+    params = {
+        "action": "query",
+        "prop": "revisions",
+        "titles": MUSEUM_PAGE,
+        "rvprop": "ids",
+        "format": "json",
+        "formatversion": 2,
+    }
+    resp = _SESSION.get(WIKIPEDIA_API, params=params, headers=headers, timeout=15)
+    resp.raise_for_status()
+    pages = resp.json().get("query", {}).get("pages", [])
+    revisions = pages[0].get("revisions") if pages else None
+    return revisions[0]["revid"] if revisions else None
+
+
+def _fetch_html() -> tuple[str, int | None]:
+    """Return the rendered page HTML and the revision it was rendered from."""
     headers = {"User-Agent": settings.wikipedia_user_agent}
     params = {
         "action": "parse",
         "page": MUSEUM_PAGE,
-        "prop": "text",
+        "prop": "text|revid",
         "format": "json",
         "formatversion": 2,
     }
-    resp = requests.get(WIKIPEDIA_API, params=params, headers=headers, timeout=30)
+    resp = _SESSION.get(WIKIPEDIA_API, params=params, headers=headers, timeout=30)
     resp.raise_for_status()
-    return resp.json()["parse"]["text"]
+    # The response is a few hundred KB of HTML escaped into one JSON string.
+    data = orjson.loads(resp.content) if orjson is not None else resp.json()
+    parsed = data["parse"]
+    return parsed["text"], parsed.get("revid")
+
+
+# ------------------------------------------------------------------
+# Parsed-page cache
+# ------------------------------------------------------------------
+
+def _read_cache(path: Path) -> dict | None:
+    """Return the cached {revid, threshold, museums} entry, or None if absent or stale."""
+    try:
+        raw = path.read_bytes()
+        cached = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except (OSError, ValueError):
+        return None
+    if cached.get("version") != CACHE_VERSION or cached.get("revid") is None:
+        return None
+    return cached
+
+
+def _write_cache(path: Path, revid: int, threshold: int, museums: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    payload = {
+        "version": CACHE_VERSION,
+        "revid": revid,
+        "threshold": threshold,
+        "museums": museums,
+    }
+    if orjson is not None:
+        data = orjson.dumps(payload)
+    else:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    tmp.write_bytes(data)
+    tmp.replace(path)
 
 
 # ------------------------------------------------------------------
@@ -54,18 +148,27 @@ def _extract_int(raw: str) -> int | None:
     (``5.7 million``).
     """
     # Take only the part before any '(' or '[' so year/refs aren't included
-    clean = re.split(r"[(\[]", str(raw))[0]
-    # Handle "X.Y million" format
-    m = re.match(r"[\s]*([0-9]+(?:\.[0-9]+)?)\s*million", clean, re.IGNORECASE)
-    if m:
-        return int(float(m.group(1)) * 1_000_000)
-    digits = re.sub(r"[^\d]", "", clean)
+    clean = str(raw).split("(", 1)[0].split("[", 1)[0]
+    # Handle "X.Y million" format; plain numbers skip the regex entirely.
+    if "million" in clean.lower():
+        m = _MILLION.match(clean)
+        if m:
+            # Integer arithmetic: int(4.1 * 1_000_000) would give 4_099_999.
+            whole, frac = m.groups()
+            return int(whole) * 1_000_000 + int((frac or "")[:6].ljust(6, "0"))
+    digits = clean.translate(_DROP_ASCII_NON_DIGITS)
+    if not digits.isdecimal():
+        # Non-ASCII leftovers (e.g. non-breaking spaces); rare, use the regex.
+        digits = _NON_DIGIT.sub("", digits)
     return int(digits) if digits else None
 
 
 def _extract_year(raw: str) -> int | None:
     """Extract a 4-digit year from parenthesized text like '(2024)' or '(FY 2024-25)'."""
-    match = re.search(r"\((?:FY\s+)?(\d{4})", str(raw))
+    raw = str(raw)
+    if "(" not in raw:
+        return None
+    match = _YEAR.search(raw)
     return int(match.group(1)) if match else None
 
 
@@ -84,26 +187,295 @@ def _col_match(headers: list[str], candidates: list[str]) -> str | None:
     return None
 
 
-def parse_museums_from_html(html: str) -> list[dict]:
-    """Parse the Wikipedia HTML into a list of museum dicts."""
-    dfs = pd.read_html(StringIO(html), extract_links="all")
+# A table cell as (text, first link href).
+_Cell = tuple[str, str | None]
+# A cell as parsed, before span expansion: (cell, rowspan, colspan).
+_RawCell = tuple[_Cell, int, int]
+# A cell spanning rows below: (column index, cell, rows still to fill).
+_Carry = tuple[int, _Cell, int]
+
+
+def _place(cell: _Cell, rowspan: int, row: list[_Cell], carried: list[_Carry]) -> None:
+    if rowspan > 1:
+        carried.append((len(row), cell, rowspan - 1))
+    row.append(cell)
+
+
+def _expand_spans(raw_rows: list[list[_RawCell]]) -> list[list[_Cell]]:
+    """Turn parsed rows into rows of cells, copying rowspan/colspan cells."""
+    rows: list[list[_Cell]] = []
+    carried: list[_Carry] = []
+    for raw in raw_rows:
+        row: list[_Cell] = []
+        next_carried: list[_Carry] = []
+        for cell, rowspan, colspan in raw:
+            # Cells spanning down from earlier rows that sit before this one
+            while carried and carried[0][0] <= len(row):
+                _, carried_cell, left = carried.pop(0)
+                _place(carried_cell, left, row, next_carried)
+            for _ in range(colspan):
+                _place(cell, rowspan, row, next_carried)
+        for _, cell, left in carried:
+            _place(cell, left, row, next_carried)
+        rows.append(row)
+        carried = next_carried
+    return rows
+
 
-    # Find the table whose headers match the expected columns.
-    df = None
-    for candidate in dfs:
-        headers = [str(c[0]).lower() for c in candidate.columns]
-        has_museum = any("museum" in h or h == "name" for h in headers)
-        has_city = any("city" in h or "location" in h for h in headers)
-        has_visitors = any("visitor" in h or "attendance" in h for h in headers)
+def _is_attendance_table(headers: list[str]) -> bool:
+    # One pass over the headers, stopping once all three columns are seen.
+    has_museum = has_city = has_visitors = False
+    for h in headers:
+        has_museum = has_museum or "museum" in h or h == "name"
+        has_city = has_city or "city" in h or "location" in h
+        has_visitors = has_visitors or "visitor" in h or "attendance" in h
         if has_museum and has_city and has_visitors:
-            df = candidate
-            break
+            return True
+    return False
+
+
+class _Table:
+    """Rows of one <table>, collected while the parser walks through it."""
+
+    def __init__(self, order: int):
+        self.order = order
+        self.section: str | None = None
+        self.has_thead = False
+        self.head: list[list[_RawCell]] = []
+        self.body: list[list[_RawCell]] = []
+        # Lower-cased header texts, set once the first body row is reached.
+        self.headers: list[str] | None = None
+        # The header doesn't match; stop collecting this table's rows.
+        self.skip = False
+        self.row: list[_RawCell] | None = None
+        self.row_in_head = False
+        self.row_all_th = True
+        self.cell_parts: list[str] | None = None
+        self.cell_href: str | None = None
+        self.cell_spans = (1, 1)
+
+    def start_row(self) -> None:
+        # Footer rows are never part of the data.
+        if self.skip or self.section == "tfoot":
+            return
+        self.row = []
+        self.row_in_head = self.section == "thead"
+        self.has_thead = self.has_thead or self.row_in_head
+        self.row_all_th = True
+
+    def end_row(self) -> None:
+        row, self.row = self.row, None
+        if row is None:
+            return
+        if self.headers is None:
+            # Header rows: the <thead>, or without one, leading all-<th> rows.
+            if self.row_in_head or (not self.has_thead and self.row_all_th):
+                self.head.append(row)
+                return
+            self.set_headers()
+            if self.skip:
+                return
+        self.body.append(row)
+
+    def start_cell(self, tag: str, attrib) -> None:
+        if self.row is None:
+            return
+        self.cell_parts = []
+        self.cell_href = None
+        self.cell_spans = (
+            int(attrib.get("rowspan") or 1),
+            int(attrib.get("colspan") or 1),
+        )
+        if tag == "td":
+            self.row_all_th = False
+
+    def end_cell(self) -> None:
+        if self.cell_parts is None or self.row is None:
+            return
+        text = _WHITESPACE.sub(" ", "".join(self.cell_parts).strip())
+        self.row.append(((text, self.cell_href), *self.cell_spans))
+        self.cell_parts = None
+
+    def set_headers(self) -> None:
+        self.headers = (
+            [text.lower() for text, _ in _expand_spans(self.head)[0]] if self.head else []
+        )
+        self.skip = not _is_attendance_table(self.headers)
+        if self.skip:
+            self.head = []
+
+
+class _MuseumTableTarget:
+    """lxml parser target that picks the attendance table out of the page.
+
+    The parser reports elements as start/end/data callbacks instead of
+    building a tree, so the rest of the article is never materialised.
+    Only table rows are kept, and a table stops collecting rows as soon as
+    its header turns out not to match. Cell text follows read_html: hidden
+    elements and <style> blocks are dropped and <br> becomes a line break.
+    """
 
-    if df is None:
+    def __init__(self):
+        self._open: list[_Table] = []
+        self._matches: list[_Table] = []
+        self._tables_seen = 0
+        # Depth inside a display:none element or <style> block within a table.
+        self._hidden = 0
+        self.found: _Table | None = None
+
+    def _open_table(self) -> None:
+        self._open.append(_Table(self._tables_seen))
+        self._tables_seen += 1
+
+    def start(self, tag: str, attrib) -> None:
+        if self.found is not None:
+            return
+        if not self._open:
+            if tag == "table":
+                self._open_table()
+            return
+        if self._hidden:
+            self._hidden += 1
+            return
+        if tag == "style" or "display:none" in attrib.get("style", "").replace(" ", ""):
+            self._hidden = 1
+            return
+
+        table = self._open[-1]
+        if tag == "table":
+            self._open_table()
+        elif tag in ("thead", "tbody", "tfoot"):
+            table.section = tag
+        elif tag == "tr":
+            table.start_row()
+        elif tag in ("td", "th"):
+            table.start_cell(tag, attrib)
+        elif tag == "br":
+            # <br> separates words visually; keep a space in the extracted text.
+            self.data("\n")
+        elif tag == "a" and "href" in attrib:
+            # First link of every open cell, nested tables included.
+            for t in self._open:
+                if t.cell_parts is not None and t.cell_href is None:
+                    t.cell_href = attrib["href"]
+
+    def end(self, tag: str) -> None:
+        if self.found is not None or not self._open:
+            return
+        if self._hidden:
+            self._hidden -= 1
+            return
+
+        table = self._open[-1]
+        if tag == "table":
+            self._close_table()
+        elif tag in ("thead", "tbody", "tfoot"):
+            table.section = None
+        elif tag == "tr":
+            table.end_row()
+        elif tag in ("td", "th"):
+            table.end_cell()
+
+    def data(self, data: str) -> None:
+        if self._hidden:
+            return
+        # A cell's text includes the text of any table nested inside it.
+        for t in self._open:
+            if t.cell_parts is not None:
+                t.cell_parts.append(data)
+
+    def close(self) -> None:
+        return None
+
+    def _close_table(self) -> None:
+        table = self._open.pop()
+        if table.headers is None:
+            table.set_headers()
+        if not table.skip:
+            self._matches.append(table)
+        # Nested tables close before the table around them; wait for the
+        # outermost one so the first match in document order wins.
+        if not self._open and self._matches:
+            self.found = min(self._matches, key=lambda t: t.order)
+
+
+# Characters handed to the parser at a time; parsing stops after the chunk
+# that completes the attendance table.
+_FEED_CHUNK = 64 * 1024
+
+
+def _scan_tables(html: str) -> _Table | None:
+    target = _MuseumTableTarget()
+    parser = lxml.etree.HTMLParser(target=target)
+    for start in range(0, len(html), _FEED_CHUNK):
+        parser.feed(html[start:start + _FEED_CHUNK])
+        if target.found is not None:
+            return target.found
+    if html:
+        # Flush the tail, closing any elements the page left open.
+        parser.close()
+    return target.found
+
+
+_WIKITABLE_OPEN = '<table class="wikitable'
+_TABLE_CLOSE = "</table>"
+
+
+def _first_wikitable(html: str) -> str | None:
+    """Return the markup of the page's first wikitable, found by plain search.
+
+    Returns None when there is no wikitable or it contains a nested table,
+    whose closing tag a plain search can't pair up.
+    """
+    start = html.find(_WIKITABLE_OPEN)
+    if start == -1:
+        return None
+    end = html.find(_TABLE_CLOSE, start)
+    if end == -1 or html.find("<table", start + 1, end) != -1:
+        return None
+    return html[start:end + len(_TABLE_CLOSE)]
+
+
+def _find_attendance_table(html: str) -> _Table:
+    # Fast path: the attendance table is the page's first wikitable, so only
+    # that slice (a few KB of a several-hundred-KB page) is parsed.
+    snippet = _first_wikitable(html)
+    table = _scan_tables(snippet) if snippet is not None else None
+    if table is None:
+        table = _scan_tables(html)
+    if table is None:
         raise ValueError("Could not find museum attendance table in Wikipedia HTML")
+    return table
+
+
+# Parsed rows for recently seen pages, keyed by a digest of the HTML.
+_PARSED: dict[tuple[bytes, int], tuple[dict, ...]] = {}
+_PARSED_MAX = 4
+
+
+def parse_museums_from_html(html: str, threshold: int = 0) -> list[dict]:
+    """Parse the Wikipedia HTML into a list of museum dicts.
+
+    With a ``threshold``, rows without a visitor count or below it are
+    skipped while parsing. Byte-identical HTML seen recently in this process
+    is not re-parsed; callers get fresh dicts and may mutate them freely.
+    """
+    key = (hashlib.blake2b(html.encode(), digest_size=16).digest(), threshold)
+    rows = _PARSED.get(key)
+    if rows is None:
+        rows = tuple(_parse_museums(html, threshold))
+        if len(_PARSED) >= _PARSED_MAX:
+            _PARSED.pop(next(iter(_PARSED)))
+        _PARSED[key] = rows
+    return [dict(r) for r in rows]
+
+
+def _parse_museums(html: str, threshold: int) -> list[dict]:
+    """Parse the attendance table out of the page HTML."""
+    table = _find_attendance_table(html)
+    headers = table.headers
+    body = _expand_spans(table.body)
 
-    # Resolve column names (each header is a (text, href) tuple).
-    headers = [str(c[0]).lower() for c in df.columns]
     mc = _col_match(headers, ["museum", "name"])
     cc = _col_match(headers, ["city", "location"])
     co = _col_match(headers, ["country"])
@@ -113,41 +485,47 @@ def parse_museums_from_html(html: str) -> list[dict]:
     if mc is None or cc is None or vc is None:
         raise ValueError(f"Missing required columns in headers: {headers}")
 
-    # Map lowercase names back to original DataFrame column tuples.
-    col_map = {str(c[0]).lower(): c for c in df.columns}
+    # Resolve column positions once; cell text is already a cleaned str.
+    col_map = {h: i for i, h in enumerate(headers)}
+    mi, ci, vi = col_map[mc], col_map[cc], col_map[vc]
+    oi = col_map[co] if co is not None else None
+    yi = col_map[yc] if yc is not None else None
+    width = len(headers)
+    empty: _Cell = ("", None)
 
     rows: list[dict] = []
-    for _, row in df.iterrows():
-        name_text, _ = row[col_map[mc]]
+    for cells in body:
+        if len(cells) < width:
+            cells += [empty] * (width - len(cells))
+        name_text = cells[mi][0]
         if not name_text:
             continue
 
-        visitor_text, _ = row[col_map[vc]]
-        city_text, city_href = row[col_map[cc]]
+        visitor_text = cells[vi][0]
+        visitors = _extract_int(visitor_text)
+        if threshold and (visitors is None or visitors < threshold):
+            continue
 
-        country = None
-        if co is not None and col_map.get(co) is not None:
-            country_text, _ = row[col_map[co]]
-            country = country_text
+        city_text, city_href = cells[ci]
+        country = cells[oi][0] if oi is not None else None
 
         # Year: from a dedicated column if present, otherwise from visitor text.
-        if yc is not None and col_map.get(yc) is not None:
-            year_text, _ = row[col_map[yc]]
-            attendance_year = _extract_int(str(year_text))
+        if yi is not None:
+            attendance_year = _extract_int(cells[yi][0])
         else:
-            attendance_year = _extract_year(str(visitor_text))
+            attendance_year = _extract_year(visitor_text)
 
         city_title = _title_from_href(city_href)
         if city_title is None:
             # No link — derive from the text.
-            clean = re.sub(r"\[.*?\]", "", str(city_text)).split(",")[0].strip()
+            clean = _BRACKETS.sub("", city_text).split(",")[0].strip()
             city_title = clean.replace(" ", "_") if clean else None
 
         rows.append({
-            "museum_name": str(name_text),
-            "city": str(city_text),
+            "museum_name": name_text,
+            "city": city_text,
             "country": country,
-            "annual_visitors": _extract_int(str(visitor_text)),
+            "annual_visitors": visitors,
             "attendance_year": attendance_year,
             "city_wikipedia_title": city_title,
             "source_url": SOURCE_URL,
@@ -163,13 +541,22 @@ def fetch_museums(threshold: int | None = None) -> list[dict]:
     """Fetch museums from Wikipedia API, applying a visitor threshold."""
     threshold = threshold or settings.visitor_threshold
 
-    html = _fetch_html()
-    museums = parse_museums_from_html(html)
-    logger.info("Fetched %d museums from Wikipedia API", len(museums))
-
-    filtered = [
-        m for m in museums
-        if m.get("annual_visitors") is not None and m["annual_visitors"] >= threshold
-    ]
-    logger.info("Returning %d museums with >= %d visitors", len(filtered), threshold)
-    return filtered
+    cache_path = Path(settings.cache_dir) / CACHE_FILE
+    cached = _read_cache(cache_path)
+    if (
+        cached is not None
+        and cached.get("threshold") == threshold
+        and cached["revid"] == _latest_revid()
+    ):
+        museums = cached["museums"]
+        logger.info("Museum page unchanged (rev %s); using %d cached museums",
+                    cached["revid"], len(museums))
+        return museums
+
+    html, revid = _fetch_html()
+    museums = parse_museums_from_html(html, threshold)
+    logger.info("Fetched %d museums with >= %d visitors from Wikipedia API",
+                len(museums), threshold)
+    if revid is not None:
+        _write_cache(cache_path, revid, threshold, museums)
+    return museums
@@ -22,10 +22,22 @@ def _default_database_url() -> str:
     return f"postgresql+psycopg2://{user}:{pw}@{host}:{port}/{db}"
 
 
-@dataclass(frozen=True)
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
     database_url: str = field(default_factory=_default_database_url)
     artifacts_dir: str = field(default_factory=lambda: os.environ.get("ARTIFACTS_DIR", "./artifacts"))
+    cache_dir: str = field(default_factory=lambda: os.environ.get("CACHE_DIR", "./cache"))
     wikipedia_user_agent: str = field(
         default_factory=lambda: os.environ.get(
             "WIKIPEDIA_USER_AGENT", "wikiapp/0.3 (museum-data-pipeline)"
@@ -35,6 +47,16 @@ class Settings:
         default_factory=lambda: os.environ.get("WIKIDATA_TOKEN")
     )
     visitor_threshold: int = 2_000_000
+    # Connection pool, per engine (the sync engine and the API's async one).
+    db_pool_size: int = field(default_factory=lambda: _env_int("DB_POOL_SIZE", 10))
+    db_max_overflow: int = field(default_factory=lambda: _env_int("DB_MAX_OVERFLOW", 5))
+    db_pool_recycle: int = field(default_factory=lambda: _env_int("DB_POOL_RECYCLE", 3600))
+    # Off by default: behind PgBouncer a pre-ping per checkout only adds
+    # round-trips; pool_recycle already retires stale connections.
+    db_pool_pre_ping: bool = field(default_factory=lambda: _env_bool("DB_POOL_PRE_PING"))
+    # Log every SQL statement; for local debugging only, e.g.
+    # ``SQLALCHEMY_ECHO=1 wikiapp build-features``.
+    sqlalchemy_echo: bool = field(default_factory=lambda: _env_bool("SQLALCHEMY_ECHO"))
 
 
 settings = Settings()
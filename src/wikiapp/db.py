@@ -6,16 +6,21 @@ individual POSTGRES_* vars (see config.py).
 
 from __future__ import annotations
 
+import io
 import logging
 from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from sqlalchemy import (
     BigInteger,
     Column,
+    Computed,
     Date,
     DateTime,
     Float,
+    Index,
+    Integer,
     MetaData,
     String,
     Table,
@@ -26,16 +31,20 @@ from sqlalchemy import (
 )
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine.url import make_url
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from wikiapp.config import settings
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
 logger = logging.getLogger(__name__)
 
 metadata = MetaData()
 
 # ------------------------------------------------------------------
-# Schema declaration (Alembic migration is the source of truth).
+# Schema declaration. Kept identical to the Alembic migrations (the source
+# of truth): fresh databases are created from it and stamped at head.
 # ------------------------------------------------------------------
 
 museums_raw = Table(
@@ -45,10 +54,24 @@ museums_raw = Table(
     Column("city", Text),
     Column("country", Text),
     Column("annual_visitors", BigInteger),
-    Column("attendance_year", BigInteger),
+    Column("attendance_year", Integer),
     Column("city_wikipedia_title", Text),
     Column("source_url", Text),
     Column("ingested_at", DateTime(timezone=True), server_default=func.current_timestamp()),
+    # Title used to look up the city's population: the linked article, else the city text.
+    Column(
+        "effective_city_title",
+        Text,
+        Computed(
+            "COALESCE(NULLIF(city_wikipedia_title, ''), NULLIF(city, ''))",
+            persisted=True,
+        ),
+    ),
+)
+Index(
+    "ix_museums_raw_effective_city_title",
+    museums_raw.c.effective_city_title,
+    postgresql_where=museums_raw.c.effective_city_title.isnot(None),
 )
 
 city_population_raw = Table(
@@ -71,11 +94,18 @@ museum_city_features = Table(
     Column("city", Text),
     Column("country", Text),
     Column("annual_visitors", BigInteger),
-    Column("attendance_year", BigInteger),
+    Column("attendance_year", Integer),
     Column("population", BigInteger),
     Column("population_as_of", Date),
     Column("created_at", DateTime(timezone=True), server_default=func.current_timestamp()),
 )
+Index("ix_features_visitors_desc", museum_city_features.c.annual_visitors.desc())
+Index(
+    "ix_features_population",
+    museum_city_features.c.population,
+    postgresql_include=["annual_visitors"],
+    postgresql_where=museum_city_features.c.population.isnot(None),
+)
 
 model_registry = Table(
     "model_registry", metadata,
@@ -85,6 +115,7 @@ model_registry = Table(
     Column("r2", Float),
     Column("mae", Float),
     Column("rmse", Float),
+    Column("n_samples", BigInteger),
     Column("created_at", DateTime(timezone=True), server_default=func.current_timestamp()),
 )
 
@@ -92,19 +123,58 @@ model_registry = Table(
 # Engine / session helpers
 # ------------------------------------------------------------------
 
+# Pool sizing and recycling come from settings (DB_POOL_* env vars).
+# LIFO keeps the most recently used connections warm and lets idle ones
+# time out server-side. Recycling replaces connections before server or
+# proxy idle limits bite, so checkouts can skip the pre-ping round-trip.
+# The larger statement cache keeps every repository query compiled.
+_POOL_OPTIONS = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_use_lifo": True,
+    "query_cache_size": 1200,
+}
+
 _engine: Engine | None = None
 
 
+def _create_engine(url: str) -> Engine:
+    return create_engine(url, echo=settings.sqlalchemy_echo, **_POOL_OPTIONS)
+
+
 def get_engine(url: str | None = None) -> Engine:
     """Return a (cached) engine."""
     global _engine
     if url:
-        return create_engine(url, echo=False)
+        return _create_engine(url)
     if _engine is None:
-        _engine = create_engine(settings.database_url, echo=False)
+        _engine = _create_engine(settings.database_url)
     return _engine
 
 
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return a (cached) asyncpg engine for the API.
+
+    Same database as ``get_engine``; only the driver differs so requests
+    await queries on the event loop instead of holding a worker thread.
+    """
+    global _async_engine
+    if _async_engine is None:
+        # Only the API runs async; the CLI never pays for this import.
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        url = make_url(settings.database_url).set(drivername="postgresql+asyncpg")
+        _async_engine = create_async_engine(
+            url, echo=settings.sqlalchemy_echo, **_POOL_OPTIONS,
+        )
+    return _async_engine
+
+
 def get_session_factory(engine: Engine | None = None) -> sessionmaker:
     engine = engine or get_engine()
     return sessionmaker(bind=engine, autoflush=False, autocommit=False)
@@ -125,14 +195,54 @@ def get_session(engine: Engine | None = None):
         session.close()
 
 
+# COPY text format escapes; NULL is written as \N.
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value) -> str:
+    return "\\N" if value is None else str(value).translate(_COPY_ESCAPES)
+
+
+def copy_rows(session: Session, table: Table, rows: list[dict]) -> None:
+    """Bulk-load ``rows`` into ``table`` with PostgreSQL ``COPY FROM STDIN``.
+
+    Like an executemany insert, the columns loaded are those present in the
+    first row; the rest take their server defaults. Runs on the session's
+    connection, so it shares the session's transaction.
+    """
+    if not rows:
+        return
+    columns = [c.name for c in table.columns if c.name in rows[0]]
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join([_copy_value(row.get(c)) for c in columns]))
+        buf.write("\n")
+    buf.seek(0)
+
+    connection = session.connection()
+    quote = connection.dialect.identifier_preparer.quote
+    sql = f"COPY {quote(table.name)} ({', '.join(map(quote, columns))}) FROM STDIN"
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(sql, buf)
+    finally:
+        cursor.close()
+
+
 # ------------------------------------------------------------------
 # Schema management
 # ------------------------------------------------------------------
 
+# Database URLs already migrated in this process; repeat calls are no-ops.
+_MIGRATED: set[str] = set()
+
+
 def migrate_db(database_url: str | None = None) -> None:
-    """Run Alembic migrations against PostgreSQL."""
+    """Run Alembic migrations against PostgreSQL (once per URL per process)."""
     url = database_url or settings.database_url
-    engine = create_engine(url, echo=False)
+    if url in _MIGRATED:
+        return
+    engine = create_engine(url, echo=settings.sqlalchemy_echo)
 
     _ensure_pg_database(url)
 
@@ -145,25 +255,42 @@ def migrate_db(database_url: str | None = None) -> None:
         logger.warning("alembic.ini not found, falling back to create_all")
         metadata.create_all(engine)
         engine.dispose()
+        _MIGRATED.add(url)
         return
 
     from alembic import command
     from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
 
     config = Config(str(ini_path))
     config.set_main_option("sqlalchemy.url", url)
+    head = ScriptDirectory.from_config(config).get_current_head()
 
-    # If tables already exist (e.g. from a previous create_all fallback) but
-    # Alembic has no version tracked yet, stamp the current head so it doesn't
-    # try to re-create them.
-    has_version_table = engine.dialect.has_table(engine.connect(), "alembic_version")
-    has_data_tables = engine.dialect.has_table(engine.connect(), "museums_raw")
-    if has_data_tables and not has_version_table:
-        logger.info("Tables exist without alembic_version — stamping head")
+    # One connection tells the three cases apart: already at head (the
+    # usual case, nothing to do), no alembic_version yet, or behind head.
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+        untracked = current != head and not engine.dialect.has_table(conn, "alembic_version")
+        has_tables = untracked and engine.dialect.has_table(conn, "museums_raw")
+    if current == head:
+        logger.debug("Schema already at head (%s)", head)
+    elif untracked and not has_tables:
+        # Fresh database: create the head schema in one pass instead of
+        # replaying every revision.
+        logger.info("Creating schema at head (%s)", head)
+        metadata.create_all(engine)
         command.stamp(config, "head")
+    elif untracked:
+        # e.g. from an older create_all fallback: only the initial schema can
+        # be assumed, so stamp 0001 and apply everything after it.
+        logger.info("Tables exist without alembic_version — stamping 0001 and upgrading")
+        command.stamp(config, "0001")
+        command.upgrade(config, "head")
     else:
         command.upgrade(config, "head")
     engine.dispose()
+    _MIGRATED.add(url)
 
 
 def _ensure_pg_database(database_url: str) -> None:
@@ -173,7 +300,9 @@ def _ensure_pg_database(database_url: str) -> None:
     if not target_db:
         return
     admin_url = url.set(database="postgres")
-    admin_engine = create_engine(admin_url, isolation_level="AUTOCOMMIT")
+    admin_engine = create_engine(
+        admin_url, echo=settings.sqlalchemy_echo, isolation_level="AUTOCOMMIT",
+    )
     try:
         with admin_engine.connect() as conn:
             exists = conn.execute(
@@ -2,83 +2,96 @@
 
 from __future__ import annotations
 
-import pandas as pd
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING
+
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import RowMapping
+
+if TYPE_CHECKING:
+    import numpy as np
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+# Built once at import so SQLAlchemy's compiled-statement cache is hit on
+# every /museums request.
+_READ_ALL = text("""
+    SELECT museum_name, city, country, annual_visitors, population
+    FROM museum_city_features
+    ORDER BY annual_visitors DESC
+""")
+
+_TRAINING_DATA = text("""
+    SELECT CAST(population AS DOUBLE PRECISION),
+           CAST(annual_visitors AS DOUBLE PRECISION)
+    FROM museum_city_features
+    WHERE population IS NOT NULL AND annual_visitors IS NOT NULL
+""")
+
+_COUNT = text("SELECT COUNT(*) FROM museum_city_features")
+
+# DISTINCT ON keeps one population row per city: the latest dated figure.
+_REBUILD = text("""
+    INSERT INTO museum_city_features
+        (museum_name, city, country, annual_visitors,
+         attendance_year, population, population_as_of)
+    SELECT m.museum_name, m.city, m.country, m.annual_visitors,
+           m.attendance_year, p.population, p.population_as_of
+    FROM museums_raw m
+    JOIN (
+        SELECT DISTINCT ON (city_wikipedia_title)
+               city_wikipedia_title, population, population_as_of
+        FROM city_population_raw
+        WHERE population IS NOT NULL
+        ORDER BY city_wikipedia_title, population_as_of DESC NULLS LAST
+    ) p ON p.city_wikipedia_title = m.city_wikipedia_title
+    WHERE m.annual_visitors >= :threshold
+""")
+
+
+def rebuild(session, visitor_threshold: int) -> int:
+    """Replace museum_city_features with museums joined to their city's population.
+
+    Museums at or above ``visitor_threshold`` are matched on
+    city_wikipedia_title to the most recent population row for that city.
+    The join runs in PostgreSQL; returns the number of rows inserted.
+    """
+    clear(session)
+    result = session.execute(_REBUILD, {"threshold": visitor_threshold})
+    return result.rowcount
 
-from wikiapp.db import get_session
 
+def clear(session) -> None:
+    """Delete all rows from museum_city_features."""
+    session.execute(text("DELETE FROM museum_city_features"))
 
-def read_museums_raw(session) -> pd.DataFrame:
-    """Read all rows from museums_raw."""
-    return pd.read_sql(
-        text("""
-            SELECT museum_name, city, country, annual_visitors,
-                   attendance_year, city_wikipedia_title
-            FROM museums_raw
-        """),
-        session.connection(),
-    )
 
+def read_all(session) -> list[RowMapping]:
+    """Return all features ordered by visitors (for API)."""
+    return session.execute(_READ_ALL).mappings().all()
 
-def read_populations_raw(session) -> pd.DataFrame:
-    """Read all rows from city_population_raw."""
-    return pd.read_sql(
-        text("""
-            SELECT city, city_wikipedia_title, wikidata_item_id,
-                   population, population_as_of
-            FROM city_population_raw
-        """),
-        session.connection(),
-    )
 
+async def stream_all(conn: AsyncConnection) -> AsyncIterator[RowMapping]:
+    """Yield features ordered by visitors from a server-side cursor."""
+    result = await conn.stream(_READ_ALL)
+    async for row in result.mappings():
+        yield row
 
-def replace_all(rows: list[dict], session) -> None:
-    """Truncate and reload museum_city_features."""
-    session.execute(text("DELETE FROM museum_city_features"))
-    for row in rows:
-        session.execute(
-            text("""
-                INSERT INTO museum_city_features
-                    (museum_name, city, country, annual_visitors,
-                     attendance_year, population, population_as_of)
-                VALUES
-                    (:museum_name, :city, :country, :annual_visitors,
-                     :attendance_year, :population, :population_as_of)
-            """),
-            row,
-        )
 
+def read_training_data(session) -> tuple[np.ndarray, np.ndarray]:
+    """Read (population, annual_visitors) as float arrays for model training.
 
-def clear(session) -> None:
-    """Delete all rows from museum_city_features."""
-    session.execute(text("DELETE FROM museum_city_features"))
+    Values arrive from the driver as floats and are flattened into one
+    2-column array; np.array over Row objects goes through the generic
+    sequence protocol per row and is ~100x slower than np.fromiter.
+    """
+    import numpy as np
 
+    rows = session.execute(_TRAINING_DATA).all()
+    data = np.fromiter((v for row in rows for v in row), dtype=np.float64).reshape(-1, 2)
+    return data[:, 0], data[:, 1]
 
-def read_all(engine: Engine | None = None) -> pd.DataFrame:
-    """Return all features ordered by visitors (for API)."""
-    with get_session(engine) as session:
-        return pd.read_sql(
-            text("""
-                SELECT museum_name, city, country, annual_visitors, population
-                FROM museum_city_features
-                ORDER BY annual_visitors DESC
-            """),
-            session.connection(),
-        )
-
-
-def read_training_data(session) -> pd.DataFrame:
-    """Read population and visitor columns for model training."""
-    return pd.read_sql(
-        text("SELECT population, annual_visitors FROM museum_city_features"),
-        session.connection(),
-    )
-
-
-def count(engine: Engine | None = None) -> int:
+
+def count(session) -> int:
     """Return the number of rows in museum_city_features."""
-    with get_session(engine) as session:
-        return session.execute(
-            text("SELECT COUNT(*) FROM museum_city_features")
-        ).scalar()
+    return session.execute(_COUNT).scalar()
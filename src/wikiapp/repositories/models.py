@@ -7,6 +7,24 @@ from sqlalchemy.engine import Engine
 
 from wikiapp.db import get_session
 
+# Statements are built once so repeated calls (every API request checks
+# _LATEST_ID) reuse SQLAlchemy's compiled form.
+_REGISTER = text("""
+    INSERT INTO model_registry (model_version, artifact_path, r2, mae, rmse, n_samples)
+    VALUES (:v, :p, :r2, :mae, :rmse, :n)
+""")
+
+_LATEST_ID = text("SELECT MAX(id) FROM model_registry")
+
+# "Latest" is the highest id everywhere, matching _LATEST_ID; the primary
+# key index answers it without a sort.
+_READ_LATEST = text("""
+    SELECT model_version, artifact_path, r2, mae, rmse, n_samples
+    FROM model_registry
+    ORDER BY id DESC
+    LIMIT 1
+""")
+
 
 def register(
     version: str,
@@ -14,30 +32,25 @@ def register(
     r2: float,
     mae: float,
     rmse: float,
+    n_samples: int,
     engine: Engine | None = None,
 ) -> None:
     """Insert a new model version into the registry."""
     with get_session(engine) as session:
         session.execute(
-            text("""
-                INSERT INTO model_registry (model_version, artifact_path, r2, mae, rmse)
-                VALUES (:v, :p, :r2, :mae, :rmse)
-            """),
-            {"v": version, "p": path, "r2": r2, "mae": mae, "rmse": rmse},
+            _REGISTER,
+            {"v": version, "p": path, "r2": r2, "mae": mae, "rmse": rmse, "n": n_samples},
         )
 
 
-def get_latest(engine: Engine | None = None) -> dict | None:
-    """Return the latest model entry (version, path, metrics), or None."""
-    with get_session(engine) as session:
-        row = session.execute(
-            text("""
-                SELECT model_version, artifact_path, r2, mae, rmse
-                FROM model_registry
-                ORDER BY created_at DESC
-                LIMIT 1
-            """)
-        ).first()
+def get_latest_id(session) -> int | None:
+    """Return the id of the most recently registered model, or None."""
+    return session.execute(_LATEST_ID).scalar()
+
+
+def read_latest(session) -> dict | None:
+    """Return the latest model entry (version, path, metrics, sample count), or None."""
+    row = session.execute(_READ_LATEST).first()
     if row is None:
         return None
     return {
@@ -46,4 +59,11 @@ def get_latest(engine: Engine | None = None) -> dict | None:
         "r2": row.r2,
         "mae": row.mae,
         "rmse": row.rmse,
+        "n_samples": row.n_samples,
     }
+
+
+def get_latest(engine: Engine | None = None) -> dict | None:
+    """Return the latest model entry (version, path, metrics, sample count), or None."""
+    with get_session(engine) as session:
+        return read_latest(session)
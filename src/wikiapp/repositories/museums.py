@@ -5,33 +5,29 @@ from __future__ import annotations
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
-from wikiapp.db import get_session
+from wikiapp.db import copy_rows, get_session, museums_raw
+
+_CLEAR = text("TRUNCATE museums_raw RESTART IDENTITY")
+
+# effective_city_title is a stored generated column (linked title, else city
+# text, blanks as NULL) with a partial index, so this is an index-backed group.
+_DISTINCT_CITY_TITLES = text("""
+    SELECT effective_city_title
+    FROM museums_raw
+    WHERE effective_city_title IS NOT NULL
+    GROUP BY effective_city_title
+""")
 
 
 def replace_all(rows: list[dict], engine: Engine | None = None) -> None:
     """Truncate and reload museums_raw with the given rows."""
     with get_session(engine) as session:
-        session.execute(text("DELETE FROM museums_raw"))
-        for row in rows:
-            session.execute(
-                text("""
-                    INSERT INTO museums_raw
-                        (museum_name, city, country, annual_visitors,
-                         attendance_year, city_wikipedia_title, source_url)
-                    VALUES
-                        (:museum_name, :city, :country, :annual_visitors,
-                         :attendance_year, :city_wikipedia_title, :source_url)
-                """),
-                row,
-            )
+        session.execute(_CLEAR)
+        copy_rows(session, museums_raw, rows)
 
 
 def get_distinct_city_titles(engine: Engine | None = None) -> list[str]:
     """Return unique city Wikipedia titles from museums_raw."""
     with get_session(engine) as session:
-        rows = session.execute(text("""
-            SELECT DISTINCT COALESCE(NULLIF(city_wikipedia_title, ''), NULLIF(city, ''))
-            FROM museums_raw
-            WHERE COALESCE(NULLIF(city_wikipedia_title, ''), NULLIF(city, '')) IS NOT NULL
-        """)).all()
-    return [r[0] for r in rows if r[0]]
+        rows = session.execute(_DISTINCT_CITY_TITLES).all()
+    return [r[0] for r in rows]
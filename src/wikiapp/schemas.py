@@ -7,7 +7,7 @@ from pydantic import BaseModel, Field
 
 class MuseumOut(BaseModel):
     museum_name: str
-    city: str
+    city: str | None
     country: str | None
     annual_visitors: int
     population: int | None
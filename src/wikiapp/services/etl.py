@@ -8,16 +8,20 @@ from __future__ import annotations
 
 import logging
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
 from wikiapp.clients.wikipedia import fetch_museums
-from wikiapp.clients.wikidata import get_city_population
+from wikiapp.clients.wikidata import MAX_TITLES_PER_REQUEST, get_city_populations
 from wikiapp.repositories import museums as museums_repo
 from wikiapp.repositories import populations as populations_repo
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent Wikidata batches; kept low to respect API rate limits.
+MAX_WORKERS = 8
+
 
 def ingest_museums(engine=None) -> int:
     """Fetch museums from Wikipedia and persist to museums_raw."""
@@ -34,20 +38,30 @@ def get_distinct_city_titles(engine=None) -> list[str]:
     return museums_repo.get_distinct_city_titles(engine)
 
 
+def _fetch_batch(titles: list[str]) -> list[dict]:
+    try:
+        return get_city_populations(titles)
+    except requests.RequestException as exc:
+        logger.warning("Skipping population for %d cities: %s", len(titles), exc)
+        return []
+
+
 def enrich_population(city_titles: Sequence[str], engine=None) -> int:
-    """Fetch population for each city from Wikidata and persist."""
+    """Fetch population for each city from Wikidata and persist.
+
+    Batches are fetched concurrently; each one is two network round-trips.
+    Duplicate titles are looked up once.
+    """
+    titles = list(dict.fromkeys(t for t in city_titles if t))
+    batches = [
+        titles[i:i + MAX_TITLES_PER_REQUEST]
+        for i in range(0, len(titles), MAX_TITLES_PER_REQUEST)
+    ]
     results = []
-    for title in city_titles:
-        if not title:
-            continue
-        try:
-            result = get_city_population(title)
-        except requests.RequestException as exc:
-            logger.warning("Skipping population for %s: %s", title, exc)
-            continue
-        if result:
-            results.append(result)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for batch_results in pool.map(_fetch_batch, batches):
+            results.extend(batch_results)
 
     populations_repo.replace_all(results, engine)
-    logger.info("Enriched population for %d / %d cities", len(results), len(city_titles))
+    logger.info("Enriched population for %d / %d cities", len(results), len(titles))
     return len(results)
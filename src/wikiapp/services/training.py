@@ -6,15 +6,15 @@ delegated to repositories.
 
 from __future__ import annotations
 
+import json
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import joblib
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sqlalchemy.engine import Engine
 
 from wikiapp.config import settings
@@ -22,6 +22,9 @@ from wikiapp.db import get_session
 from wikiapp.repositories import features as features_repo
 from wikiapp.repositories import models as models_repo
 
+if TYPE_CHECKING:
+    from sklearn.linear_model import LinearRegression
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,45 +40,97 @@ class TrainResult:
     n_samples: int
 
 
+@dataclass(frozen=True)
+class LinearModel:
+    """A fitted single-feature linear model, as stored in a JSON artifact.
+
+    Exposes the parts of sklearn's LinearRegression that callers use
+    (``coef_``, ``intercept_``, ``predict``) without importing sklearn.
+    """
+
+    coef: float
+    intercept: float
+
+    @property
+    def coef_(self) -> np.ndarray:
+        return np.array([self.coef])
+
+    @property
+    def intercept_(self) -> float:
+        return self.intercept
+
+    def predict(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=float)[:, 0] * self.coef + self.intercept
+
+
+def _fit_line(x: np.ndarray, y: np.ndarray) -> LinearModel:
+    """Ordinary least squares for ``y = coef * x + intercept``.
+
+    Same solution as sklearn's LinearRegression on a single feature,
+    including ``coef = 0`` when every ``x`` is equal.
+    """
+    x_mean, y_mean = x.mean(), y.mean()
+    dx = x - x_mean
+    ss = float(dx @ dx)
+    coef = float(dx @ (y - y_mean)) / ss if ss else 0.0
+    return LinearModel(coef=coef, intercept=float(y_mean - coef * x_mean))
+
+
+def _metrics(y: np.ndarray, y_pred: np.ndarray) -> tuple[float, float, float]:
+    """Return ``(r2, rmse, mae)`` from one residual array.
+
+    Matches sklearn's r2_score, mean_squared_error and mean_absolute_error,
+    including r2 = 1.0 (perfect fit) or 0.0 when ``y`` is constant.
+    """
+    diff = y - y_pred
+    sse = float(diff @ diff)
+    dy = y - y.mean()
+    sst = float(dy @ dy)
+    if sst:
+        r2 = 1.0 - sse / sst
+    else:
+        r2 = 1.0 if sse == 0 else 0.0
+    return r2, float(np.sqrt(sse / y.size)), float(np.abs(diff).mean())
+
+
 def train(engine: Engine | None = None) -> TrainResult:
     """Train a log-log linear regression and persist the artifact."""
     with get_session(engine) as session:
-        df = features_repo.read_training_data(session)
+        population, y_raw = features_repo.read_training_data(session)
 
-    if df.empty:
+    if y_raw.size == 0:
         raise ValueError("No training data in museum_city_features")
 
-    X_raw = df[["population"]].to_numpy(dtype=float)
-    y_raw = df["annual_visitors"].to_numpy(dtype=float)
-
-    # Log-log transform
-    log_X = np.log(X_raw)
+    # Log-log transform; one feature, so a closed-form fit is enough.
+    log_x = np.log(population)
     log_y = np.log(y_raw)
-
-    model = LinearRegression()
-    model.fit(log_X, log_y)
+    model = _fit_line(log_x, log_y)
 
     # Metrics in original space for interpretability
-    y_pred = np.exp(model.predict(log_X))
-    r2 = float(r2_score(y_raw, y_pred))
-    rmse = float(np.sqrt(mean_squared_error(y_raw, y_pred)))
-    mae = float(mean_absolute_error(y_raw, y_pred))
+    y_pred = np.exp(model.coef * log_x + model.intercept)
+    r2, rmse, mae = _metrics(y_raw, y_pred)
 
     # Save artifact
     version = datetime.now(tz=timezone.utc).strftime("%Y%m%d%H%M%S")
     artifacts_dir = Path(settings.artifacts_dir)
     artifacts_dir.mkdir(parents=True, exist_ok=True)
-    artifact_path = str(artifacts_dir / f"log_regression_{version}.joblib")
-    joblib.dump(model, artifact_path)
+    artifact_path = str(artifacts_dir / f"log_regression_{version}.json")
+    Path(artifact_path).write_text(
+        json.dumps({"coef": model.coef, "intercept": model.intercept})
+    )
+    # Versions have one-second resolution, so a path can be rewritten. This
+    # only reaches callers in this process; the API server picks up new models
+    # through its registry-id check (api._get_cached_model).
+    load_model.cache_clear()
 
     # Register in DB
-    models_repo.register(version, artifact_path, r2, mae, rmse, engine)
+    models_repo.register(version, artifact_path, r2, mae, rmse, len(y_raw), engine)
 
     result = TrainResult(
         model_version=version,
         artifact_path=artifact_path,
-        coef=float(model.coef_[0]),
-        intercept=float(model.intercept_),
+        coef=model.coef,
+        intercept=model.intercept,
         r2=r2, rmse=rmse, mae=mae,
         n_samples=len(y_raw),
     )
@@ -84,13 +139,34 @@ def train(engine: Engine | None = None) -> TrainResult:
     return result
 
 
-def load_latest_model(engine: Engine | None = None) -> tuple[LinearRegression, str]:
+@lru_cache(maxsize=4)
+def load_model(artifact_path: str) -> LinearModel | LinearRegression:
+    """Load a persisted model artifact from disk.
+
+    Artifacts are JSON ``{coef, intercept}`` files; models registered
+    before that were joblib pickles of a LinearRegression and still load.
+    Each training run writes a new versioned file, so loaded models are
+    cached by path and shared between callers in this process. Other
+    processes see a new model through the registry, not this cache.
+    """
+    path = Path(artifact_path)
+    if path.suffix == ".json":
+        params = json.loads(path.read_text())
+        return LinearModel(coef=params["coef"], intercept=params["intercept"])
+
+    import joblib
+
+    return joblib.load(path)
+
+
+def load_latest_model(
+    engine: Engine | None = None,
+) -> tuple[LinearModel | LinearRegression, str]:
     """Load the most recently registered model from disk."""
     meta = models_repo.get_latest(engine)
     if meta is None:
         raise ValueError("No model found in model_registry. Run training first.")
-    model = joblib.load(meta["artifact_path"])
-    return model, meta["model_version"]
+    return load_model(meta["artifact_path"]), meta["model_version"]
 
 
 def summary_from_db(engine: Engine | None = None) -> dict | None:
@@ -103,4 +179,5 @@ def summary_from_db(engine: Engine | None = None) -> dict | None:
         "r2": meta["r2"],
         "mae": meta["mae"],
         "rmse": meta["rmse"],
+        "n_samples": meta["n_samples"],
     }
@@ -14,6 +14,7 @@ from wikiapp.clients.wikidata import (
     _fetch_population_from_wikidata,
     _get_wikidata_item_id,
     get_city_population,
+    get_city_populations,
 )
 
 functional = pytest.mark.functional
@@ -85,3 +86,12 @@ def test_get_city_population_new_york():
 def test_get_city_population_unknown_city():
     result = get_city_population("ThisCityDoesNotExist12345")
     assert result is None
+
+
+@functional
+def test_get_city_populations_batch():
+    """Several titles resolve in one batch, unknown ones are dropped."""
+    results = get_city_populations(["Paris", "New_York_City", "ThisCityDoesNotExist12345"])
+    by_title = {r["city_wikipedia_title"]: r for r in results}
+    assert set(by_title) == {"Paris", "New_York_City"}
+    assert by_title["Paris"]["wikidata_item_id"] == "Q90"
@@ -4,18 +4,30 @@ from __future__ import annotations
 
 from datetime import date
 
+import numpy as np
 import pytest
+import sqlalchemy as sa
 from pydantic import ValidationError
 
 from wikiapp.clients.wikipedia import (
+    CACHE_VERSION,
     _col_match,
     _extract_int,
     _extract_year,
+    _read_cache,
     _title_from_href,
+    _write_cache,
     parse_museums_from_html,
 )
-from wikiapp.clients.wikidata import _parse_population_statement
-from wikiapp.schemas import PredictRequest
+from wikiapp.clients.wikidata import (
+    _item_ids_from_query,
+    _parse_population_statement,
+    _population_from_entity,
+)
+from wikiapp import db
+from wikiapp.db import _copy_value
+from wikiapp.schemas import MuseumOut, PredictRequest
+from wikiapp.services.training import LinearModel, _fit_line, _metrics, load_model
 
 
 # ---- _extract_int ----
@@ -26,7 +38,10 @@ from wikiapp.schemas import PredictRequest
     ("4,603,025 (2024) [10]", 4_603_025),
     ("5.7 million (FY 2024-25)", 5_700_000),
     ("3.1 million (2024)", 3_100_000),
+    ("4.1 million", 4_100_000),
+    ("12 million", 12_000_000),
     ("8,900,000", 8_900_000),
+    ("3\u00a0200\u00a0000 [4]", 3_200_000),
     ("2024", 2024),
     ("", None),
     ("no digits here", None),
@@ -114,6 +129,18 @@ def test_parse_inline_year_format():
     assert rows[2]["annual_visitors"] == 1_859_484
 
 
+def test_parse_applies_threshold():
+    rows = parse_museums_from_html(SAMPLE_HTML_INLINE_YEAR, threshold=2_000_000)
+    assert [r["museum_name"] for r in rows] == ["Louvre", "Metropolitan Museum of Art"]
+
+
+def test_parse_returns_independent_copies():
+    first = parse_museums_from_html(SAMPLE_HTML_INLINE_YEAR)
+    first[0]["museum_name"] = "changed"
+    second = parse_museums_from_html(SAMPLE_HTML_INLINE_YEAR)
+    assert second[0]["museum_name"] == "Louvre"
+
+
 # ---- _col_match ----
 
 def test_col_match_finds_first_match():
@@ -172,6 +199,84 @@ def test_parse_without_country_column():
     assert rows[0]["museum_name"] == "Louvre"
 
 
+def test_parse_rowspan_and_hidden_sort_keys():
+    """Rowspan cells repeat on the rows they cover; display:none text is dropped."""
+    html = """
+    <table>
+      <thead><tr><th>Name</th><th>Visitors</th><th>City</th><th>Country</th></tr></thead>
+      <tbody>
+        <tr>
+          <td>Louvre</td>
+          <td><span style="display: none">0009000000</span>9,000,000 (2025)</td>
+          <td rowspan="2"><a href="/wiki/Paris">Paris</a></td>
+          <td rowspan="2">France</td>
+        </tr>
+        <tr><td>Musée d'Orsay</td><td>3,900,000 (2024)</td></tr>
+      </tbody>
+    </table>
+    """
+    rows = parse_museums_from_html(html)
+    assert [r["annual_visitors"] for r in rows] == [9_000_000, 3_900_000]
+    assert rows[1]["city_wikipedia_title"] == "Paris"
+    assert rows[1]["country"] == "France"
+
+
+def test_parse_skips_other_tables_and_footer():
+    """Earlier non-matching tables, nested tables and <tfoot> rows don't leak in."""
+    html = """
+    <table class="infobox"><tr><th>Name</th><td>Not a museum list</td></tr></table>
+    <table>
+      <thead><tr><th>Name</th><th>Visitors</th><th>City</th></tr></thead>
+      <tbody>
+        <tr>
+          <td>Louvre <table><tr><td>note</td></tr></table></td>
+          <td>8,900,000</td>
+          <td><a href="/wiki/Paris">Paris</a></td>
+        </tr>
+      </tbody>
+      <tfoot><tr><td>Total</td><td>8,900,000</td><td></td></tr></tfoot>
+    </table>
+    """
+    rows = parse_museums_from_html(html)
+    assert len(rows) == 1
+    assert rows[0]["museum_name"] == "Louvre note"
+    assert rows[0]["city_wikipedia_title"] == "Paris"
+
+
+def test_parse_wikitable_fast_path_matches_full_parse():
+    """Slicing out the first wikitable gives the same rows as scanning the page."""
+    html = (
+        "<div class=\"mw-parser-output\"><p>Intro <a href=\"/wiki/Museum\">text</a></p>"
+        "<table class=\"infobox\"><tr><th>Name</th><td>Not a museum list</td></tr></table>"
+        "<table class=\"wikitable sortable\">"
+        + SAMPLE_HTML_INLINE_YEAR.split(">", 1)[1]
+        + "<p>Footer</p></div>"
+    )
+    full_parse_only = html.replace("wikitable", "datatable")
+    assert parse_museums_from_html(html) == parse_museums_from_html(full_parse_only)
+    assert len(parse_museums_from_html(html)) == 3
+
+
+# ---- parsed-page cache ----
+
+def test_cache_round_trip(tmp_path, mock_museums):
+    path = tmp_path / "cache" / "museums_page.json"
+    _write_cache(path, 1234, 2_000_000, mock_museums)
+    cached = _read_cache(path)
+    assert cached["revid"] == 1234
+    assert cached["threshold"] == 2_000_000
+    assert cached["museums"] == mock_museums
+
+
+def test_cache_ignores_missing_or_outdated_files(tmp_path):
+    path = tmp_path / "museums_page.json"
+    assert _read_cache(path) is None
+    path.write_text(f'{{"version": {CACHE_VERSION + 1}, "revid": 1, "museums": []}}')
+    assert _read_cache(path) is None
+    path.write_text("not json")
+    assert _read_cache(path) is None
+
+
 # ---- _parse_population_statement ----
 
 def test_parse_population_with_date():
@@ -203,6 +308,193 @@ def test_parse_population_invalid_amount():
     assert pop is None
 
 
+def test_parse_population_skips_malformed_qualifiers():
+    stmt = {
+        "mainsnak": {"snaktype": "value", "datavalue": {"value": {"amount": "+100"}}},
+        "qualifiers": {"P585": [
+            {"datavalue": {"value": {"time": "+2019-01-01T00:00:00Z"}}},
+            {"snaktype": "novalue"},
+            {"datavalue": {"value": {"time": "+2021-00-00T00:00:00Z"}}},
+        ]},
+    }
+    pop, as_of = _parse_population_statement(stmt)
+    assert pop == 100
+    assert as_of == date(2019, 1, 1)
+
+
+# ---- batched Wikidata responses ----
+
+def test_item_ids_from_query_maps_normalized_titles():
+    data = {
+        "query": {
+            "normalized": [{"from": "New_York_City", "to": "New York City"}],
+            "pages": {
+                "645042": {"title": "New York City", "pageprops": {"wikibase_item": "Q60"}},
+                "22989": {"title": "Paris", "pageprops": {"wikibase_item": "Q90"}},
+                "-1": {"title": "Nowhere12345", "missing": ""},
+            },
+        }
+    }
+    item_ids = _item_ids_from_query(data)
+    assert item_ids["New_York_City"] == "Q60"
+    assert item_ids["Paris"] == "Q90"
+    assert "Nowhere12345" not in item_ids
+
+
+def test_item_ids_from_query_follows_redirects():
+    data = {
+        "query": {
+            "normalized": [{"from": "New_York", "to": "New York"}],
+            "redirects": [
+                {"from": "New York", "to": "New York City"},
+                {"from": "NYC", "to": "New York City"},
+            ],
+            "pages": {
+                "645042": {"title": "New York City", "pageprops": {"wikibase_item": "Q60"}},
+            },
+        }
+    }
+    item_ids = _item_ids_from_query(data)
+    assert item_ids["New_York"] == "Q60"
+    assert item_ids["NYC"] == "Q60"
+
+
+def test_population_from_entity_prefers_latest_date():
+    entity = {
+        "labels": {"en": {"value": "Paris"}},
+        "claims": {"P1082": [
+            {
+                "mainsnak": {"datavalue": {"value": {"amount": "+2100000"}}},
+                "qualifiers": {"P585": [{"datavalue": {"value": {"time": "+2022-01-01T00:00:00Z"}}}]},
+            },
+            {
+                "mainsnak": {"datavalue": {"value": {"amount": "+2200000"}}},
+                "qualifiers": {"P585": [{"datavalue": {"value": {"time": "+2010-01-01T00:00:00Z"}}}]},
+            },
+        ]},
+    }
+    result = _population_from_entity("Q90", entity)
+    assert result["city"] == "Paris"
+    assert result["population"] == 2_100_000
+    assert result["population_as_of"] == date(2022, 1, 1)
+
+
+def test_population_from_entity_without_claims():
+    assert _population_from_entity("Q1", {"labels": {}}) is None
+
+
+# ---- COPY encoding ----
+
+@pytest.mark.parametrize("value, expected", [
+    (None, "\\N"),
+    ("", ""),
+    (3_000_000, "3000000"),
+    (date(2024, 1, 2), "2024-01-02"),
+    ("a\tb\nc\rd", "a\\tb\\nc\\rd"),
+    ("back\\slash \\N", "back\\\\slash \\\\N"),
+])
+def test_copy_value(value, expected):
+    assert _copy_value(value) == expected
+
+
+# ---- migrate_db ----
+
+@pytest.fixture()
+def alembic_calls(monkeypatch):
+    """Record Alembic stamp/upgrade calls instead of running them."""
+    import alembic.command
+
+    calls = []
+    monkeypatch.setattr(alembic.command, "stamp", lambda cfg, rev: calls.append(("stamp", rev)))
+    monkeypatch.setattr(alembic.command, "upgrade", lambda cfg, rev: calls.append(("upgrade", rev)))
+    monkeypatch.setattr(db, "_ensure_pg_database", lambda url: None)
+    return calls
+
+
+def test_migrate_db_fresh_database_creates_and_stamps_head(tmp_path, alembic_calls):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    db.migrate_db(url)
+    assert alembic_calls == [("stamp", "head")]
+    assert "museums_raw" in sa.inspect(db.create_engine(url)).get_table_names()
+
+
+def test_migrate_db_unversioned_tables_upgrade_from_0001(tmp_path, alembic_calls):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    with db.create_engine(url).begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE museums_raw (id INTEGER PRIMARY KEY)")
+    db.migrate_db(url)
+    assert alembic_calls == [("stamp", "0001"), ("upgrade", "head")]
+
+
+# ---- model artifacts ----
+
+def test_load_model_from_json_artifact(tmp_path):
+    path = tmp_path / "log_regression_1.json"
+    path.write_text('{"coef": 0.5, "intercept": 2.0}')
+    model = load_model(str(path))
+    assert model == LinearModel(coef=0.5, intercept=2.0)
+    assert float(model.coef_[0]) == 0.5
+    assert model.intercept_ == 2.0
+    assert model.predict([[2.0], [4.0]]).tolist() == [3.0, 4.0]
+
+
+def test_load_model_from_legacy_joblib_artifact(tmp_path):
+    """Models registered before JSON artifacts were sklearn pickles."""
+    import joblib
+    from sklearn.linear_model import LinearRegression
+
+    path = tmp_path / "log_regression_0.joblib"
+    joblib.dump(LinearRegression().fit([[0.0], [1.0]], [1.0, 3.0]), path)
+    model = load_model(str(path))
+    assert model.predict([[2.0]]).round(6).tolist() == [5.0]
+
+
+def test_fit_line_matches_sklearn():
+    from sklearn.linear_model import LinearRegression
+
+    rng = np.random.default_rng(0)
+    x = rng.uniform(13, 17, size=30)
+    y = 0.4 * x + 9 + rng.normal(0, 0.3, size=30)
+    model = _fit_line(x, y)
+    reference = LinearRegression().fit(x.reshape(-1, 1), y)
+    assert model.coef == pytest.approx(reference.coef_[0])
+    assert model.intercept == pytest.approx(reference.intercept_)
+
+
+def test_fit_line_constant_feature():
+    model = _fit_line(np.array([2.0, 2.0]), np.array([1.0, 3.0]))
+    assert model == LinearModel(coef=0.0, intercept=2.0)
+
+
+def test_metrics_match_sklearn():
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    rng = np.random.default_rng(1)
+    y = rng.uniform(1e6, 1e7, size=30)
+    y_pred = y * rng.uniform(0.7, 1.3, size=30)
+    r2, rmse, mae = _metrics(y, y_pred)
+    assert r2 == pytest.approx(r2_score(y, y_pred))
+    assert rmse == pytest.approx(np.sqrt(mean_squared_error(y, y_pred)))
+    assert mae == pytest.approx(mean_absolute_error(y, y_pred))
+
+
+@pytest.mark.parametrize("y_pred, expected", [([5.0, 5.0], 1.0), ([4.0, 6.0], 0.0)])
+def test_metrics_r2_constant_target(y_pred, expected):
+    r2, _, _ = _metrics(np.array([5.0, 5.0]), np.array(y_pred))
+    assert r2 == expected
+
+
+# ---- MuseumOut ----
+
+def test_museum_out_allows_missing_city():
+    # museums_raw.city is nullable and /museums serializes rows unvalidated.
+    museum = MuseumOut(
+        museum_name="Louvre", city=None, country="France",
+        annual_visitors=8_900_000, population=None,
+    )
+    assert museum.city is None
+
+
 # ---- PredictRequest validation ----
 
 def test_predict_request_valid():